@@ -53,6 +53,7 @@ setup(
         "notebook_runner": ["IPython>=8.11", "nbformat>=5.0", "regex>=2020.6"],
         "azure": ["azure-storage-blob>=12.16.0", "azure-identity>=1.12.0"],
         "open_data": ["pandas>=2.1.4", "jsonlines>=4.0.0"],
+        "zstd": ["zstandard>=0.19.0"],
         "testing": [
             "pytest",
             "pytest-cov",
@@ -61,6 +62,7 @@ setup(
             "pytest-xdist",
             "pre-commit",
             "moto",
+            "zstandard>=0.19.0",
             "ruff",
             "responses<0.22.0",
             "types-pyYAML",
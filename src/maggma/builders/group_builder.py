@@ -1,6 +1,7 @@
 """
 Many-to-Many GroupBuilder.
 """
+
 import traceback
 from abc import ABCMeta, abstractmethod
 from datetime import datetime
@@ -224,7 +225,7 @@ class GroupBuilder(Builder, metaclass=ABCMeta):
         for chunked_keys in grouper(keys, self.chunk_size):
             docs = list(
                 self.source.query(
-                    criteria={self.source.key: {"$in": chunked_keys}},
+                    criteria={self.source.key: {"$in": list(chunked_keys)}},
                     properties=grouping_keys,
                 )
             )
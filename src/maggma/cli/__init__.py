@@ -2,22 +2,19 @@
 # coding utf-8
 
 
-import asyncio
 import logging
 import sys
 from datetime import datetime
 from itertools import chain
 
 import click
-from monty.serialization import loadfn
 
-from maggma.cli.distributed import find_port
-from maggma.cli.multiprocessing import multi
-from maggma.cli.serial import serial
 from maggma.cli.settings import CLISettings
-from maggma.cli.source_loader import ScriptFinder, load_builder_from_source
+from maggma.cli.source_loader import ScriptFinder
 from maggma.utils import ReportingHandler, TqdmLoggingHandler
 
+# Registered on import so that builders defined in scripts can be found again when
+# they are deserialized, e.g. by spawned processes or distributed workers
 sys.meta_path.append(ScriptFinder())
 
 settings = CLISettings()
@@ -146,12 +143,6 @@ def run(
             )
         )
 
-    # Import proper manager and worker
-    if rabbitmq:
-        from maggma.cli.rabbitmq import manager, worker
-    else:
-        from maggma.cli.distributed import manager, worker
-
     # Set Logging
     levels = [logging.WARNING, logging.INFO, logging.DEBUG]
     level = levels[min(len(levels) - 1, verbosity)]  # capped to number of levels
@@ -162,10 +153,16 @@ def run(
     ch.setFormatter(formatter)
     root.addHandler(ch)
 
+    # The heavier imports are deferred to the code paths that need them to keep
+    # mrun's startup, which is paid by every worker, short
+    from monty.serialization import loadfn
+
     builder_objects = []
 
     for b in builders:
         if str(b).endswith(".py") or str(b).endswith(".ipynb"):
+            from maggma.cli.source_loader import load_builder_from_source
+
             builder_objects.append(load_builder_from_source(b))
         else:
             builder_objects.append(loadfn(b))
@@ -178,9 +175,17 @@ def run(
         root.addHandler(ReportingHandler(reporting_store))
 
     if url:
+        # Import proper manager and worker
+        if rabbitmq:
+            from maggma.cli.rabbitmq import manager, worker
+        else:
+            from maggma.cli.distributed import manager, worker
+
         if num_chunks > 0:
             # Manager
             if port is None:
+                from maggma.cli.distributed import find_port
+
                 port = find_port()
                 root.critical(f"Using random port for mrun manager: {port}")
 
@@ -216,12 +221,21 @@ def run(
                 worker(url=url, port=port, num_processes=num_processes, no_bars=no_bars)
     else:
         if num_processes == 1:
+            from maggma.cli.serial import serial
+
             for builder in builder_objects:
                 serial(builder, no_bars)
         else:
-            loop = asyncio.get_event_loop()
-            for builder in builder_objects:
-                loop.run_until_complete(multi(builder=builder, num_processes=num_processes, no_bars=no_bars))
+            import asyncio
+
+            from maggma.cli.multiprocessing import multi
+
+            async def run_builders():
+                # Share one event loop across all builders
+                for builder in builder_objects:
+                    await multi(builder=builder, num_processes=num_processes, no_bars=no_bars)
+
+            asyncio.run(run_builders())
 
     if memray_file:
         import subprocess
@@ -17,7 +17,7 @@ from monty.serialization import MontyDecoder
 from maggma.cli.multiprocessing import multi
 from maggma.cli.settings import CLISettings
 from maggma.core import Builder
-from maggma.utils import tqdm
+from maggma.utils import get_tqdm
 
 settings = CLISettings()
 
@@ -57,12 +57,12 @@ def manager(url: str, port: int, builders: List[Builder], num_chunks: int, num_w
         try:
             builder.connect()
             chunk_dicts = [{"chunk": d, "distributed": False, "completed": False} for d in builder.prechunk(num_chunks)]
-            pbar_distributed = tqdm(
+            pbar_distributed = get_tqdm()(
                 total=len(chunk_dicts),
                 desc=f"Distributed chunks for {builder.__class__.__name__}",
             )
 
-            pbar_completed = tqdm(
+            pbar_completed = get_tqdm()(
                 total=len(chunk_dicts),
                 desc=f"Completed chunks for {builder.__class__.__name__}",
             )
@@ -8,9 +8,8 @@ from types import GeneratorType
 from typing import Any, Callable, Dict, Optional
 
 from aioitertools import enumerate
-from tqdm.auto import tqdm
 
-from maggma.utils import primed
+from maggma.utils import get_tqdm, primed
 
 logger = getLogger("MultiProcessor")
 
@@ -107,7 +106,7 @@ async def atqdm(async_iterator, *args, **kwargs):
     """
     Wrapper around tqdm for async generators.
     """
-    _tqdm = tqdm(*args, **kwargs)
+    _tqdm = get_tqdm()(*args, **kwargs)
     async for item in async_iterator:
         _tqdm.update()
         yield item
@@ -186,6 +185,7 @@ async def multi(
         },
     )
 
+    tqdm = get_tqdm()
     back_pressured_get = BackPressure(
         iterator=tqdm(cursor, desc="Get", total=total, disable=no_bars),
         n=builder.chunk_size,
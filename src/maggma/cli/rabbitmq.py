@@ -16,7 +16,7 @@ from monty.serialization import MontyDecoder
 from maggma.cli.multiprocessing import multi
 from maggma.cli.settings import CLISettings
 from maggma.core import Builder
-from maggma.utils import Timeout, tqdm
+from maggma.utils import Timeout, get_tqdm
 
 try:
     import pika
@@ -67,12 +67,12 @@ def manager(
         try:
             builder.connect()
             chunk_dicts = [{"chunk": d, "distributed": False, "completed": False} for d in builder.prechunk(num_chunks)]
-            pbar_distributed = tqdm(
+            pbar_distributed = get_tqdm()(
                 total=len(chunk_dicts),
                 desc=f"Distributed chunks for {builder.__class__.__name__}",
             )
 
-            pbar_completed = tqdm(
+            pbar_completed = get_tqdm()(
                 total=len(chunk_dicts),
                 desc=f"Completed chunks for {builder.__class__.__name__}",
             )
@@ -4,10 +4,8 @@
 import logging
 from types import GeneratorType
 
-from tqdm.auto import tqdm
-
 from maggma.core import Builder
-from maggma.utils import grouper, primed
+from maggma.utils import get_tqdm, grouper, primed
 
 
 def serial(builder: Builder, no_bars=False):
@@ -47,7 +45,7 @@ def serial(builder: Builder, no_bars=False):
             }
         },
     )
-    for chunk in grouper(tqdm(cursor, total=total, disable=no_bars), builder.chunk_size):
+    for chunk in grouper(get_tqdm()(cursor, total=total, disable=no_bars), builder.chunk_size):
         logger.info(
             f"Processing batch of {builder.chunk_size} items",
             extra={
@@ -4,17 +4,10 @@ from glob import glob
 from importlib.abc import Loader, MetaPathFinder
 from importlib.machinery import ModuleSpec, SourceFileLoader
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from maggma.core import Builder
-
-try:
-    import nbformat
-    from IPython import get_ipython
-    from IPython.core.interactiveshell import InteractiveShell
-    from regex import match
-except ModuleNotFoundError:
-    pass
+if TYPE_CHECKING:
+    from maggma.core import Builder
 
 _BASENAME = "maggma.cli.sources"
 
@@ -45,6 +38,9 @@ class NotebookLoader(Loader):
     """Module Loader for Jupyter Notebooks or Source Files."""
 
     def __init__(self, name=None, path=None):
+        # Notebook support is optional and slow to import, so only load it when needed
+        from IPython.core.interactiveshell import InteractiveShell
+
         self.shell = InteractiveShell.instance()
 
         self.name = name
@@ -54,6 +50,9 @@ class NotebookLoader(Loader):
         return None
 
     def exec_module(self, module):
+        import nbformat
+        from IPython import get_ipython
+
         module.__dict__["get_ipython"] = get_ipython
         module.__path__ = self.path
 
@@ -113,7 +112,7 @@ def spec_from_source(file_path: str) -> ModuleSpec:
     return spec
 
 
-def load_builder_from_source(file_path: str) -> List[Builder]:
+def load_builder_from_source(file_path: str) -> List["Builder"]:
     """
     Loads Maggma Builders from a Python source file.
     """
@@ -137,6 +136,7 @@ def find_matching_file(segments, curr_path="./"):
     in the path relative to the current path
     Requires all segments match the file path.
     """
+    from regex import match
 
     # If we've gotten to the end of the segment match check to see if a file exists
     if len(segments) == 0:
@@ -9,7 +9,7 @@ from typing import Any, Dict, Iterable, List, Union
 from monty.json import MontyDecoder, MSONable
 
 from maggma.core.store import Store
-from maggma.utils import TqdmLoggingHandler, grouper, tqdm
+from maggma.utils import TqdmLoggingHandler, get_tqdm, grouper
 
 
 class Builder(MSONable, metaclass=ABCMeta):
@@ -133,7 +133,7 @@ class Builder(MSONable, metaclass=ABCMeta):
 
         cursor = self.get_items()
 
-        for chunk in grouper(tqdm(cursor), self.chunk_size):
+        for chunk in grouper(get_tqdm()(cursor), self.chunk_size):
             self.logger.info(f"Processing batch of {self.chunk_size} items")
             processed_chunk = [self.process_item(item) for item in chunk]
             processed_items = [item for item in processed_chunk if item is not None]
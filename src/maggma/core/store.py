@@ -10,10 +10,10 @@ from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from monty.dev import deprecated
 from monty.json import MontyDecoder, MSONable
-from pydash import get, has, identity
+from pydash import get, has
 
 from maggma.core.validator import Validator
-from maggma.utils import LU_KEY_ISOFORMAT
+from maggma.utils import LU_KEY_DATETIME, LU_KEY_ISOFORMAT
 
 
 class Sort(Enum):
@@ -55,7 +55,7 @@ class Store(MSONable, metaclass=ABCMeta):
         self.last_updated_field = last_updated_field
         self.last_updated_type = last_updated_type
         self._lu_func: Tuple[Callable, Callable] = (
-            LU_KEY_ISOFORMAT if DateTimeFormat(last_updated_type) == DateTimeFormat.IsoFormat else (identity, identity)
+            LU_KEY_ISOFORMAT if DateTimeFormat(last_updated_type) == DateTimeFormat.IsoFormat else LU_KEY_DATETIME
         )
         self.validator = validator
         self.logger = logging.getLogger(type(self).__name__)
@@ -3,14 +3,16 @@
 import threading
 import warnings
 import zlib
-from concurrent.futures import wait
+from collections import OrderedDict, deque
+from concurrent.futures import Future, as_completed
 from concurrent.futures.thread import ThreadPoolExecutor
 from hashlib import sha1
 from io import BytesIO
 from json import dumps
-from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
 import msgpack  # type: ignore
+import orjson
 from monty.msgpack import default as monty_default
 
 from maggma.core import Sort, Store
@@ -21,10 +23,58 @@ try:
     import boto3
     import botocore
     from boto3.session import Session
+    from botocore.config import Config
     from botocore.exceptions import ClientError
 except (ImportError, ModuleNotFoundError):
     boto3 = None  # type: ignore
 
+try:
+    import zstandard
+except (ImportError, ModuleNotFoundError):
+    zstandard = None  # type: ignore
+
+COMPRESSION_METHODS = ("zlib", "zstd")
+SERIALIZATION_METHODS = ("msgpack", "orjson")
+# Objects at least this large are transferred in parallel parts, matching boto3's defaults
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CONCURRENCY = 10
+# Number of uploaded documents to collect before writing them to the index
+INDEX_BATCH_SIZE = 500
+
+# Sessions are expensive to create since they load the botocore data files and resolve
+# credentials, so they are shared between stores using the same profile. Sessions are
+# not thread-safe, so creating them and creating resources from them is serialized.
+# Only the most recently used sessions are kept, as stores given temporary credentials
+# see a new set of them every time these are rotated.
+_SESSIONS: "OrderedDict[str, Any]" = OrderedDict()
+_SESSION_LOCK = threading.Lock()
+MAX_CACHED_SESSIONS = 16
+
+
+def _new_session(s3_profile: Optional[Union[str, dict]] = None):
+    if isinstance(s3_profile, dict):
+        return Session(**s3_profile)
+    return Session(profile_name=s3_profile)
+
+
+def _get_cached_session(s3_profile: Optional[Union[str, dict]] = None):
+    """Returns the boto3 session for a profile name or credentials dictionary."""
+    try:
+        cache_key = dumps(s3_profile, sort_keys=True)
+    except (TypeError, ValueError):
+        # e.g. credentials holding a botocore session, which can't make up a cache key
+        with _SESSION_LOCK:
+            return _new_session(s3_profile)
+
+    with _SESSION_LOCK:
+        if cache_key in _SESSIONS:
+            _SESSIONS.move_to_end(cache_key)
+        else:
+            _SESSIONS[cache_key] = _new_session(s3_profile)
+            if len(_SESSIONS) > MAX_CACHED_SESSIONS:
+                _SESSIONS.popitem(last=False)
+        return _SESSIONS[cache_key]
+
 
 class S3Store(Store):
     """
@@ -49,6 +99,8 @@ class S3Store(Store):
         unpack_data: bool = True,
         searchable_fields: Optional[List[str]] = None,
         index_store_kwargs: Optional[dict] = None,
+        compression: str = "zlib",
+        serialization: str = "msgpack",
         **kwargs,
     ):
         """
@@ -67,7 +119,8 @@ class S3Store(Store):
             endpoint_url: this allows the interface with minio service; ignored if
                 `ssh_tunnel` is provided, in which case it is inferred.
             sub_dir: subdirectory of the S3 bucket to store the data.
-            s3_workers: number of concurrent S3 puts to run.
+            s3_workers: number of concurrent S3 puts to run, and of S3 gets to keep in
+                flight while querying.
             s3_resource_kwargs: additional kwargs to pass to the boto3 session resource.
             ssh_tunnel: optional SSH tunnel to use for the S3 connection.
             key: main key to index on.
@@ -77,9 +130,21 @@ class S3Store(Store):
             searchable_fields: fields to keep in the index store.
             index_store_kwargs: kwargs to pass to the index store. Allows the user to
                 use kwargs here to update the index store.
+            compression: algorithm used to compress files when `compress` is True, either
+                "zlib" or "zstd". Objects are always read back with the algorithm recorded
+                in their index document, so the two can be mixed within a bucket.
+            serialization: format used to serialize documents into S3, either "msgpack"
+                or "orjson". As with compression, reads use the format recorded in the
+                index document. "orjson" cannot store bytes values, which "msgpack" can.
         """
         if boto3 is None:
             raise RuntimeError("boto3 and botocore are required for S3Store")
+        if compression not in COMPRESSION_METHODS:
+            raise ValueError(f"Unknown compression method {compression}, expected one of {COMPRESSION_METHODS}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("zstandard is required for zstd compression in S3Store")
+        if serialization not in SERIALIZATION_METHODS:
+            raise ValueError(f"Unknown serialization {serialization}, expected one of {SERIALIZATION_METHODS}")
         self.index_store_kwargs = index_store_kwargs or {}
         if index_store_kwargs:
             d_ = index.as_dict()
@@ -90,6 +155,8 @@ class S3Store(Store):
         self.bucket = bucket
         self.s3_profile = s3_profile
         self.compress = compress
+        self.compression = compression
+        self.serialization = serialization
         self.endpoint_url = endpoint_url
         self.sub_dir = sub_dir.strip("/") + "/" if sub_dir else ""
         self.s3: Any = None
@@ -112,6 +179,9 @@ class S3Store(Store):
         kwargs["key"] = str(index.key)
 
         self._thread_local = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._s3_to_mongo_keys_cache: Dict[Tuple, Tuple[Dict, str]] = {}
         super().__init__(**kwargs)
 
     @property
@@ -126,11 +196,14 @@ class S3Store(Store):
             force_reset: whether to force a reset of the connection
         """
         if self.s3 is None or force_reset:
+            # Worker threads notice the new resource and recreate their buckets from it,
+            # so the pool is kept for queries and updates that are still running
             self.s3, self.s3_bucket = self._get_resource_and_bucket()
         self.index.connect(force_reset=force_reset)
 
     def close(self):
         """Closes any connections."""
+        self._shutdown_executor()
         self.index.close()
 
         self.s3.meta.client.close()
@@ -186,35 +259,155 @@ class S3Store(Store):
         elif isinstance(properties, list):
             prop_keys = set(properties)
 
-        for doc in self.index.query(criteria=criteria, sort=sort, limit=limit, skip=skip):
-            if properties is not None and prop_keys.issubset(set(doc.keys())):
-                yield {p: doc[p] for p in properties if p in doc}
-            else:
-                try:
-                    # TODO: This is ugly and unsafe, do some real checking before pulling data
-                    data = self.s3_bucket.Object(self._get_full_key_path(doc[self.key])).get()["Body"].read()
-                except botocore.exceptions.ClientError as e:
-                    # If a client error is thrown, then check that it was a NoSuchKey or NoSuchBucket error.
-                    # If it was a NoSuchKey error, then the object does not exist.
-                    error_code = e.response["Error"]["Code"]
-                    if error_code in ["NoSuchKey", "NoSuchBucket"]:
-                        error_message = e.response["Error"]["Message"]
-                        self.logger.error(
-                            f"S3 returned '{error_message}' while querying '{self.bucket}' for '{doc[self.key]}'"
-                        )
-                        continue
-                    else:
-                        raise e
-
-                if self.unpack_data:
-                    data = self._read_data(data=data, compress_header=doc.get("compression", ""))
-
-                    if self.last_updated_field in doc:
-                        data[self.last_updated_field] = doc[self.last_updated_field]
-
-                yield data
-
-    def _read_data(self, data: bytes, compress_header: str) -> Dict:
+        prop_fields = tuple(properties) if properties is not None else ()
+        index_properties = None
+        if properties is not None:
+            # Only pull the requested fields from the index, along with those needed to
+            # read the object from S3 if the index can't satisfy the request
+            index_properties = list(prop_keys | {self.key, self.last_updated_field, "compression", "serialization"})
+
+        index_docs = self.index.query(criteria=criteria, properties=index_properties, sort=sort, limit=limit, skip=skip)
+
+        if self.s3_workers <= 1:
+            for doc in index_docs:
+                if properties is not None and prop_keys.issubset(doc):
+                    yield {p: doc[p] for p in prop_fields}
+                else:
+                    data = self._read_doc_from_s3(doc)
+                    if data is not None:
+                        yield data
+            return
+
+        # Keep a bounded window of S3 reads in flight so that the per-object latency
+        # overlaps across workers, while still yielding documents in index order
+        window = 2 * self.s3_workers
+        pending: Deque[Union[Dict, Future]] = deque()
+        pool = self._get_executor()
+        try:
+            for doc in index_docs:
+                if properties is not None and prop_keys.issubset(doc):
+                    pending.append({p: doc[p] for p in prop_fields})
+                else:
+                    pending.append(pool.submit(self._read_doc_from_s3, doc))
+
+                while len(pending) >= window:
+                    data = self._resolve_pending(pending.popleft())
+                    if data is not None:
+                        yield data
+
+            while pending:
+                data = self._resolve_pending(pending.popleft())
+                if data is not None:
+                    yield data
+        finally:
+            # Don't fetch objects nobody will consume if the generator is closed early
+            for item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+
+    @staticmethod
+    def _resolve_pending(item: Union[Dict, Future]) -> Any:
+        """Returns the document for an entry of the query read-ahead window."""
+        if isinstance(item, Future):
+            return item.result()
+        return item
+
+    def _read_doc_from_s3(self, doc: Dict) -> Any:
+        """Fetches the S3 object for an index document.
+
+        Args:
+            doc (Dict): The index document for the object.
+
+        Returns:
+            The unpacked document, the raw bytes if `unpack_data` is False, or None if
+            the object does not exist.
+        """
+        try:
+            # TODO: This is ugly and unsafe, do some real checking before pulling data
+            data = self._get_object_data(self._get_full_key_path(doc[self.key]))
+        except botocore.exceptions.ClientError as e:
+            # If a client error is thrown, then check that it was a NoSuchKey or NoSuchBucket error.
+            # If it was a NoSuchKey error, then the object does not exist.
+            error_code = e.response["Error"]["Code"]
+            if error_code in ["NoSuchKey", "NoSuchBucket"]:
+                error_message = e.response["Error"]["Message"]
+                self.logger.error(f"S3 returned '{error_message}' while querying '{self.bucket}' for '{doc[self.key]}'")
+                return None
+            raise e
+
+        if self.unpack_data:
+            data = self._read_data_with(
+                data=data,
+                compress_header=doc.get("compression", ""),
+                serialization=doc.get("serialization", "msgpack"),
+            )
+
+            if self.last_updated_field in doc:
+                data[self.last_updated_field] = doc[self.last_updated_field]
+
+        return data
+
+    def _get_object_data(self, s3_key: str) -> bytes:
+        """Downloads the content of an S3 object.
+
+        Args:
+            s3_key (str): The full key path of the object.
+
+        Returns:
+            bytes: The content of the object.
+        """
+        return self._get_object_data_and_metadata(s3_key)[0]
+
+    def _get_object_data_and_metadata(self, s3_key: str) -> Tuple[bytes, Dict[str, str]]:
+        """Downloads the content of an S3 object along with its user metadata.
+
+        Only the first MULTIPART_THRESHOLD bytes are requested at first, so small
+        objects still take a single request. The rest of larger objects is fetched
+        as concurrent byte-range requests.
+
+        Args:
+            s3_key (str): The full key path of the object.
+
+        Returns:
+            Tuple[bytes, Dict[str, str]]: The content and the metadata of the object.
+        """
+        s3_object = self._get_bucket().Object(s3_key)
+        try:
+            response = s3_object.get(Range=f"bytes=0-{MULTIPART_THRESHOLD - 1}")
+        except botocore.exceptions.ClientError as e:
+            # No range is satisfiable for an empty object
+            if e.response["Error"]["Code"] != "InvalidRange":
+                raise
+            response = s3_object.get()
+        head = response["Body"].read()
+        # e.g. "bytes 0-8388607/20000000", absent if the server ignored the range
+        size = int(response.get("ContentRange", "").rpartition("/")[2] or len(head))
+        metadata = response.get("Metadata", {})
+        if size <= len(head):
+            return head, metadata
+
+        # Clients, unlike resources, are safe to share between threads
+        client = self._get_bucket().meta.client
+        etag = response["ETag"]
+
+        def get_range(start: int) -> bytes:
+            end = min(start + MULTIPART_THRESHOLD, size) - 1
+            part = client.get_object(Bucket=self.bucket, Key=s3_key, Range=f"bytes={start}-{end}", IfMatch=etag)
+            return part["Body"].read()
+
+        starts = range(len(head), size, MULTIPART_THRESHOLD)
+        with ThreadPoolExecutor(max_workers=min(MULTIPART_CONCURRENCY, len(starts))) as pool:
+            return b"".join([head, *pool.map(get_range, starts)]), metadata
+
+    def _read_data_with(self, data: bytes, compress_header: str, serialization: str) -> Dict:
+        """Calls _read_data, only passing the serialization when it isn't msgpack so that
+        overrides written before it was added keep working for msgpack objects.
+        """
+        if serialization == "msgpack":
+            return self._read_data(data=data, compress_header=compress_header)
+        return self._read_data(data=data, compress_header=compress_header, serialization=serialization)
+
+    def _read_data(self, data: bytes, compress_header: str, serialization: str = "msgpack") -> Dict:
         """Reads the data and transforms it into a dictionary.
         Allows for subclasses to apply custom schemes for transforming
         the data retrieved from S3.
@@ -222,11 +415,16 @@ class S3Store(Store):
         Args:
             data (bytes): The raw byte representation of the data.
             compress_header (str): String representing the type of compression used on the data.
+            serialization (str): String representing the format the data was serialized with.
 
         Returns:
             Dict: Dictionary representation of the data.
         """
-        return self._unpack(data=data, compressed=compress_header == "zlib")
+        if compress_header:
+            data = self._get_decompression_function(compress_header)(data)
+        if serialization == "orjson":
+            return orjson.loads(data)
+        return self._unpack(data=data, compressed=False)
 
     @staticmethod
     def _unpack(data: bytes, compressed: bool):
@@ -329,7 +527,9 @@ class S3Store(Store):
         else:
             additional_metadata = list(additional_metadata)
 
-        self._write_to_s3_and_index(docs, key + additional_metadata + self.searchable_fields)
+        # The key is commonly also a searchable field, only pull each field once per doc
+        search_keys = list(dict.fromkeys(key + additional_metadata + self.searchable_fields))
+        self._write_to_s3_and_index(docs, search_keys)
 
     def _write_to_s3_and_index(self, docs: List[Dict], search_keys: List[str]):
         """Implements updating of the provided documents in S3 and the index.
@@ -339,30 +539,53 @@ class S3Store(Store):
             docs (List[Dict]): The documents to update
             search_keys (List[str]): The keys of the information to be updated in the index
         """
-        with ThreadPoolExecutor(max_workers=self.s3_workers) as pool:
-            fs = {
-                pool.submit(
-                    self.write_doc_to_s3,
-                    doc=itr_doc,
-                    search_keys=search_keys,
-                )
-                for itr_doc in docs
-            }
-            fs, _ = wait(fs)
-
-            search_docs = [sdoc.result() for sdoc in fs]
-
-        # Use store's update to remove key clashes
-        self.index.update(search_docs, key=self.key)
+        pool = self._get_executor()
+        fs = [
+            pool.submit(
+                self.write_doc_to_s3,
+                doc=itr_doc,
+                search_keys=search_keys,
+            )
+            for itr_doc in docs
+        ]
+
+        # Flush the index in batches as uploads finish, so index writes overlap with
+        # the remaining uploads instead of waiting on the slowest one
+        search_docs = []
+        for sdoc in as_completed(fs):
+            search_docs.append(sdoc.result())
+            if len(search_docs) >= INDEX_BATCH_SIZE:
+                # Use store's update to remove key clashes
+                self.index.update(search_docs, key=self.key)
+                search_docs = []
+
+        if search_docs:
+            self.index.update(search_docs, key=self.key)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Returns the thread pool used for S3 transfers, creating it if needed.
+
+        The pool lives until the store is closed so that its threads keep their
+        S3 buckets across calls.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.s3_workers)
+            return self._executor
+
+    def _shutdown_executor(self):
+        """Shuts down the thread pool used for S3 transfers, if any."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
 
     def _get_session(self):
         if self.ssh_tunnel is not None:
             self.ssh_tunnel.start()
 
         if not hasattr(self._thread_local, "s3_bucket"):
-            if isinstance(self.s3_profile, dict):
-                return Session(**self.s3_profile)
-            return Session(profile_name=self.s3_profile)
+            return _get_cached_session(self.s3_profile)
 
         return None
 
@@ -374,13 +597,18 @@ class S3Store(Store):
 
     def _get_bucket(self):
         """If on the main thread return the bucket created above, else create a new
-        bucket on each thread."""
+        bucket on each thread.
+
+        Resource objects are not thread-safe, but the client underneath them is, so
+        the buckets of all threads share the client and its connection pool.
+        """
         if threading.current_thread().name == "MainThread":
             return self.s3_bucket
 
-        if not hasattr(self._thread_local, "s3_bucket"):
-            _, bucket = self._get_resource_and_bucket()
-            self._thread_local.s3_bucket = bucket
+        # Buckets made from a resource that has since been reset are recreated
+        if getattr(self._thread_local, "s3_resource", None) is not self.s3:
+            self._thread_local.s3_bucket = self.s3.Bucket(self.bucket)
+            self._thread_local.s3_resource = self.s3
 
         return self._thread_local.s3_bucket
 
@@ -388,11 +616,21 @@ class S3Store(Store):
         """Helper function to create the resource and bucket objects."""
         session = self._get_session()
         endpoint_url = self._get_endpoint_url()
-        resource = session.resource("s3", endpoint_url=endpoint_url, **self.s3_resource_kwargs)
+        # Size the connection pool for every worker running a ranged download at once
+        config = Config(max_pool_connections=max(self.s3_workers, 1) * MULTIPART_CONCURRENCY)
+        resource_kwargs = dict(self.s3_resource_kwargs)
+        if "config" in resource_kwargs:
+            config = config.merge(resource_kwargs.pop("config"))
+        with _SESSION_LOCK:
+            resource = session.resource("s3", endpoint_url=endpoint_url, config=config, **resource_kwargs)
         try:
             resource.meta.client.head_bucket(Bucket=self.bucket)
-        except ClientError:
-            raise RuntimeError("Bucket not present on AWS")
+        except ClientError as e:
+            # Only a missing bucket is reported as such, anything else (e.g. a 403
+            # for missing permissions) is raised as is
+            if e.response["Error"]["Code"] in ["404", "NoSuchBucket"]:
+                raise RuntimeError("Bucket not present on AWS")
+            raise e
         bucket = resource.Bucket(self.bucket)
 
         return resource, bucket
@@ -406,14 +644,46 @@ class S3Store(Store):
         Returns:
             str: The full key path
         """
-        return self.sub_dir + str(id)
+        key = id if isinstance(id, str) else str(id)
+        # Skip the concatenation, and the new string it allocates, for the common
+        # case of a store without a sub_dir
+        return self.sub_dir + key if self.sub_dir else key
+
+    def _get_serialization_function(self) -> Callable:
+        """Returns the function to use for serializing documents."""
+        if self.serialization == "orjson":
+            # Let datetimes and dataclasses fall through to monty so they are encoded
+            # the same way as with msgpack
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            return lambda doc: orjson.dumps(doc, default=monty_default, option=option)
+        # packb builds a new Packer on every call, so keep one per thread instead
+        packer = getattr(self._thread_local, "packer", None)
+        if packer is None:
+            packer = self._thread_local.packer = msgpack.Packer(default=monty_default)
+        return packer.pack
 
     def _get_compression_function(self) -> Callable:
         """Returns the function to use for compressing data."""
+        if self.compression == "zstd":
+            # Compressors must not be shared between threads
+            compressor = getattr(self._thread_local, "compressor", None)
+            if compressor is None:
+                compressor = self._thread_local.compressor = zstandard.ZstdCompressor(level=3)
+            return compressor.compress
         return zlib.compress
 
-    def _get_decompression_function(self) -> Callable:
-        """Returns the function to use for decompressing data."""
+    def _get_decompression_function(self, compression: Optional[str] = None) -> Callable:
+        """Returns the function to use for decompressing data.
+
+        Args:
+            compression (str): The compression method of the data, defaults to the
+                compression method of the store.
+        """
+        compression = compression or self.compression
+        if compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd compressed data from S3Store")
+            return zstandard.ZstdDecompressor().decompress
         return zlib.decompress
 
     def write_doc_to_s3(self, doc: Dict, search_keys: List[str]) -> Dict:
@@ -441,24 +711,25 @@ class S3Store(Store):
 
         # to make hashing more meaningful, make sure last updated field is removed
         lu_info = doc.pop(self.last_updated_field, None)
-        data = msgpack.packb(doc, default=monty_default)
+        data = self._get_serialization_function()(doc)
+        if self.serialization != "msgpack":
+            search_doc["serialization"] = self.serialization
 
         if self.compress:
-            # Compress with zlib if chosen
-            search_doc["compression"] = "zlib"
+            search_doc["compression"] = self.compression
             data = self._get_compression_function()(data)
 
         # keep a record of original keys, in case these are important for the individual researcher
         # it is not expected that this information will be used except in disaster recovery
-        s3_to_mongo_keys = {k: self._sanitize_key(k) for k in search_doc}
-        s3_to_mongo_keys["s3-to-mongo-keys"] = "s3-to-mongo-keys"  # inception
-        # encode dictionary since values have to be strings
-        search_doc["s3-to-mongo-keys"] = dumps(s3_to_mongo_keys)
-        s3_bucket.upload_fileobj(
-            Fileobj=BytesIO(data),
-            Key=self._get_full_key_path(str(doc[self.key])),
-            ExtraArgs={"Metadata": {s3_to_mongo_keys[k]: str(v) for k, v in search_doc.items()}},
-        )
+        s3_to_mongo_keys, search_doc["s3-to-mongo-keys"] = self._get_s3_to_mongo_keys(tuple(search_doc))
+        s3_key = self._get_full_key_path(doc[self.key])
+        metadata = {s3_to_mongo_keys[k]: str(v) for k, v in search_doc.items()}
+        if len(data) < MULTIPART_THRESHOLD:
+            # Hand the payload straight to a single PUT rather than going through the
+            # transfer manager, which re-reads the file object into new request bodies
+            s3_bucket.put_object(Body=data, Key=s3_key, Metadata=metadata)
+        else:
+            s3_bucket.upload_fileobj(Fileobj=BytesIO(data), Key=s3_key, ExtraArgs={"Metadata": metadata})
 
         if lu_info is not None:
             search_doc[self.last_updated_field] = lu_info
@@ -470,6 +741,25 @@ class S3Store(Store):
             search_doc["obj_hash"] = obj_hash
         return search_doc
 
+    def _get_s3_to_mongo_keys(self, keys: Tuple) -> Tuple[Dict, str]:
+        """Maps index keys to their sanitized S3 metadata keys.
+
+        All documents of an update share the same keys, so the mapping and its
+        encoding are cached rather than rebuilt for every document.
+
+        Args:
+            keys (Tuple): The keys of the index document.
+
+        Returns:
+            Tuple[Dict, str]: The mapping, and the mapping encoded as a string.
+        """
+        if keys not in self._s3_to_mongo_keys_cache:
+            s3_to_mongo_keys = {k: self._sanitize_key(k) for k in keys}
+            s3_to_mongo_keys["s3-to-mongo-keys"] = "s3-to-mongo-keys"  # inception
+            # encode dictionary since values have to be strings
+            self._s3_to_mongo_keys_cache[keys] = (s3_to_mongo_keys, dumps(s3_to_mongo_keys))
+        return self._s3_to_mongo_keys_cache[keys]
+
     @staticmethod
     def _sanitize_key(key):
         """Sanitize keys to store in S3/MinIO metadata."""
@@ -492,17 +782,33 @@ class S3Store(Store):
             criteria: query dictionary to match.
             remove_s3_object: whether to remove the actual S3 object or not.
         """
-        if not remove_s3_object:
-            self.index.remove_docs(criteria=criteria)
-        else:
-            to_remove = self.index.distinct(self.key, criteria=criteria)
-            self.index.remove_docs(criteria=criteria)
+        if remove_s3_object:
+            # Stream the keys from the index rather than collecting them all up front.
+            # The objects are deleted before the index documents so that the cursor is
+            # exhausted before its documents are removed.
+            keys = (doc[self.key] for doc in self.index.query(criteria=criteria, properties=[self.key]))
 
-            # Can remove up to 1000 items at a time via boto
-            to_remove_chunks = list(grouper(to_remove, n=1000))
-            for chunk_to_remove in to_remove_chunks:
-                objlist = [{"Key": self._get_full_key_path(obj)} for obj in chunk_to_remove]
-                self.s3_bucket.delete_objects(Delete={"Objects": objlist})
+            # Can remove up to 1000 items at a time via boto, send the chunks concurrently
+            # while keeping the number of pending chunks bounded
+            pool = self._get_executor()
+            pending: Deque[Future] = deque()
+            for chunk_to_remove in grouper(keys, n=1000):
+                pending.append(pool.submit(self._delete_s3_objects, keys=chunk_to_remove))
+                if len(pending) >= 2 * self.s3_workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+
+        self.index.remove_docs(criteria=criteria)
+
+    def _delete_s3_objects(self, keys: List[str]):
+        """Deletes up to 1000 objects from S3 in a single request.
+
+        Args:
+            keys: the values of the key identifier of the objects to delete.
+        """
+        objlist = [{"Key": self._get_full_key_path(obj)} for obj in keys]
+        self._get_bucket().delete_objects(Delete={"Objects": objlist})
 
     @property
     def last_updated(self):
@@ -532,16 +838,23 @@ class S3Store(Store):
         Relies on the index document being stores as the metadata for the file. This can
         help recover lost databases.
         """
-        bucket = self.s3_bucket
-        objects = bucket.objects.filter(Prefix=self.sub_dir)
-        for obj in objects:
-            key_ = self._get_full_key_path(obj.key)
-            data = self.s3_bucket.Object(key_).get()["Body"].read()
-
-            if self.compress:
-                data = self._get_decompression_function()(data)
-            unpacked_data = msgpack.unpackb(data, raw=False)
-            self.update(unpacked_data, **kwargs)
+        paginator = self.s3.meta.client.get_paginator("list_objects_v2")
+        pool = self._get_executor()
+        # Download and re-index one listing page at a time to keep memory bounded
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.sub_dir):
+            keys = [obj["Key"] for obj in page.get("Contents", [])]
+            # Each object is decoded with the compression and serialization recorded in
+            # its metadata, as these can differ between the objects of a bucket
+            docs = [
+                self._read_data_with(
+                    data=data,
+                    compress_header=metadata.get("compression", ""),
+                    serialization=metadata.get("serialization", "msgpack"),
+                )
+                for data, metadata in pool.map(self._get_object_data_and_metadata, keys)
+            ]
+            if docs:
+                self.update(docs, **kwargs)
 
     def rebuild_metadata_from_index(self, index_query: Optional[dict] = None):
         """
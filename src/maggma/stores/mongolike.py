@@ -31,7 +31,7 @@ from pymongo import MongoClient, ReplaceOne, uri_parser
 from pymongo.errors import ConfigurationError, DocumentTooLarge, OperationFailure
 
 from maggma.core import Sort, Store, StoreError
-from maggma.utils import confirm_field_index, to_dt
+from maggma.utils import confirm_field_index, invalidate_index_cache, to_dt
 
 try:
     from montydb import MontyClient, set_storage  # type: ignore
@@ -366,6 +366,8 @@ class MongoStore(Store):
             return True
         except Exception:
             return False
+        finally:
+            invalidate_index_cache(self._collection)
 
     def update(self, docs: Union[List[Dict], Dict], key: Union[List, str, None] = None):
         """
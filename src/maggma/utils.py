@@ -1,25 +1,56 @@
 """
 Utilities to help with maggma functions.
 """
+
 import itertools
 import logging
 import signal
+import sys
+import time
 import uuid
+import weakref
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from importlib import import_module
-from typing import Dict, Iterable, Optional, Set, Union
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Union
 
 from bson.json_util import ObjectId
 from dateutil import parser
 from pydantic import BaseModel
 from pydantic._internal._utils import lenient_issubclass
-from pydash.objects import get, has, set_
-from pydash.objects import unset as _unset
-from pydash.utilities import to_path
 from pymongo.collection import Collection
 
-# import tqdm Jupyter widget if running inside Jupyter
-from tqdm.auto import tqdm
+try:
+    from itertools import batched  # type: ignore
+except ImportError:
+    batched = None
+
+# Sentinel for missing dictionary values, allowing a single lookup where None is a
+# valid value
+_MISSING = object()
+
+_ONE_MS = timedelta(milliseconds=1)
+
+
+@lru_cache(maxsize=1)
+def get_tqdm():
+    """Returns the tqdm progress bar class, the Jupyter widget if running inside Jupyter.
+
+    The choice is made on first use rather than on import, and tqdm.auto's notebook
+    detection is skipped entirely unless IPython has been loaded.
+    """
+    if "IPython" in sys.modules:
+        from tqdm.auto import tqdm
+    else:
+        from tqdm import tqdm
+    return tqdm
+
+
+def __getattr__(name: str):
+    # tqdm used to be imported here at module level, keep it importable from maggma.utils
+    if name == "tqdm":
+        return get_tqdm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def primed(iterable: Iterable) -> Iterable:
@@ -28,10 +59,12 @@ def primed(iterable: Iterable) -> Iterable:
     """
     itr = iter(iterable)
     try:
-        first = next(itr)  # itr.next() in Python 2
+        first = next(itr)
     except StopIteration:
         return itr
-    return itertools.chain([first], itr)
+    # chain is implemented in C and is cheaper per item than a generator re-yielding
+    # the items, so stick with it rather than a `yield from` wrapper
+    return itertools.chain((first,), itr)
 
 
 class TqdmLoggingHandler(logging.Handler):
@@ -49,17 +82,52 @@ class TqdmLoggingHandler(logging.Handler):
         """
         Emit a record via Tqdm screen.
         """
+        # KeyboardInterrupt and SystemExit aren't Exceptions, so they propagate as is
         try:
-            msg = self.format(record)
-            tqdm.write(msg)
-            self.flush()
-        except (KeyboardInterrupt, SystemExit):
-            raise
+            get_tqdm().write(self.format(record))
         except Exception:
             self.handleError(record)
 
 
-def confirm_field_index(collection: Collection, field: str) -> bool:
+# Indexed fields per collection, keyed by id with a weak reference to tell apart
+# collections that reuse the id of one that has been garbage collected. Entries are
+# dropped once their collection has been garbage collected.
+_INDEXED_FIELDS: Dict[int, Tuple[weakref.ref, FrozenSet[str]]] = {}
+
+
+def _forget_indexed_fields(ref: weakref.ref, key: int):
+    """Drops the cached indexes of a collection that has been garbage collected."""
+    cached = _INDEXED_FIELDS.get(key)
+    # The id may already have been reused by a collection cached since
+    if cached is not None and cached[0] is ref:
+        _INDEXED_FIELDS.pop(key, None)
+
+
+def _indexed_fields(collection: Collection) -> FrozenSet[str]:
+    """Returns the fields covered by an index of the collection, cached per collection."""
+    cached = _INDEXED_FIELDS.get(id(collection))
+    if cached is not None and cached[0]() is collection:
+        return cached[1]
+
+    info = collection.index_information().values()
+    fields = frozenset(spec[0] for index in info for spec in index["key"])
+    key = id(collection)
+    _INDEXED_FIELDS[key] = (weakref.ref(collection, partial(_forget_indexed_fields, key=key)), fields)
+    return fields
+
+
+def invalidate_index_cache(collection: Optional[Collection] = None):
+    """Forget the cached indexes of a collection, or of all collections if None.
+
+    Needs to be called after creating or dropping indexes.
+    """
+    if collection is None:
+        _INDEXED_FIELDS.clear()
+    else:
+        _INDEXED_FIELDS.pop(id(collection), None)
+
+
+def confirm_field_index(collection: Collection, fields: Union[str, Iterable[str]]) -> bool:
     """Confirm index on store for at least one of fields.
 
     One can't simply ensure an index exists via
@@ -67,20 +135,21 @@ def confirm_field_index(collection: Collection, field: str) -> bool:
     read-only access to source Stores. The MongoDB `read` built-in role
     does not include the `createIndex` action.
 
+    The indexes of a collection are only fetched once, see invalidate_index_cache.
+
     Returns:
         True if an index exists for a given field
         False if not
 
     """
-    info = list(collection.index_information().values())
-    keys = {spec[0] for index in info for spec in index["key"]}
-    return field in keys
+    fields = (fields,) if isinstance(fields, str) else fields
+    return not _indexed_fields(collection).isdisjoint(fields)
 
 
 def to_isoformat_ceil_ms(dt: Union[datetime, str]) -> str:
     """Helper to account for Mongo storing datetimes with only ms precision."""
     if isinstance(dt, datetime):
-        return (dt + timedelta(milliseconds=1)).isoformat(timespec="milliseconds")
+        return (dt + _ONE_MS).isoformat(timespec="milliseconds")
     if isinstance(dt, str):
         return dt
     return None
@@ -90,7 +159,12 @@ def to_dt(s: Union[datetime, str]) -> datetime:
     """Convert an ISO 8601 string to a datetime."""
 
     if isinstance(s, str):
-        return parser.parse(s)
+        # fromisoformat is much faster than dateutil and handles the strings written
+        # by to_isoformat_ceil_ms, so only fall back to dateutil for other formats
+        try:
+            return datetime.fromisoformat(s)
+        except ValueError:
+            return parser.parse(s)
     if isinstance(s, datetime):
         return s
     return None
@@ -103,6 +177,16 @@ def to_dt(s: Union[datetime, str]) -> datetime:
 LU_KEY_ISOFORMAT = (to_dt, to_isoformat_ceil_ms)
 
 
+def _as_is(dt: datetime) -> datetime:
+    return dt
+
+
+# Native datetimes are stored as BSON dates, which are compact, index well and need no
+# conversion for queries. ISO strings left over from before a store switched to
+# datetimes are still parsed when read.
+LU_KEY_DATETIME = (to_dt, _as_is)
+
+
 def recursive_update(d: Dict, u: Dict):
     """
     Recursive updates d with values from u.
@@ -112,27 +196,49 @@ def recursive_update(d: Dict, u: Dict):
         u (dict): updates to propagate
     """
 
-    for k, v in u.items():
-        if k in d:
-            if isinstance(v, dict) and isinstance(d[k], dict):
-                recursive_update(d[k], v)
+    # Walk the nested dicts with an explicit stack rather than recursing, so deep
+    # updates neither pay a call per level nor hit the recursion limit
+    stack = [(d, u)]
+    while stack:
+        dd, uu = stack.pop()
+        for k, v in uu.items():
+            existing = dd.get(k, _MISSING)
+            if existing is not _MISSING and isinstance(v, dict) and isinstance(existing, dict):
+                stack.append((existing, v))
             else:
-                d[k] = v
-        else:
-            d[k] = v
+                dd[k] = v
 
 
-def grouper(iterable: Iterable, n: int) -> Iterable:
+def grouper(iterable: Iterable, n: int) -> Iterable[Sequence]:
     """
     Collect data into fixed-length chunks or blocks.
-    >>> list(grouper(3, 'ABCDEFG'))
-    [['A', 'B', 'C'], ['D', 'E', 'F'], ['G']].
+    >>> list(grouper('ABCDEFG', 3))
+    [('A', 'B', 'C'), ('D', 'E', 'F'), ('G',)].
 
-    Updated from:
+    Lists, tuples and numpy arrays are sliced instead, giving chunks of the same
+    type (views for arrays), as are the rows of pandas and pyarrow tables. Other
+    iterables use itertools.batched where available (python 3.12+), otherwise
+    updated from:
     https://stackoverflow.com/questions/31164731/python-chunking-csv-file-multiproccessing/31170795#31170795
     """
+    if n > 0:
+        # numpy, pandas and pyarrow aren't imported here to keep importing maggma light,
+        # and an object can only be one of their types if they have already been imported
+        np = sys.modules.get("numpy")
+        if isinstance(iterable, (list, tuple)) or (np is not None and isinstance(iterable, np.ndarray)):
+            return (iterable[i : i + n] for i in range(0, len(iterable), n))
+
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(iterable, (pd.DataFrame, pd.Series)):
+            return (iterable.iloc[i : i + n] for i in range(0, len(iterable), n))
+        pa = sys.modules.get("pyarrow")
+        if pa is not None and isinstance(iterable, (pa.Table, pa.RecordBatch)):
+            return (iterable.slice(i, n) for i in range(0, len(iterable), n))
+
+    if batched is not None and n > 0:
+        return batched(iterable, n)
     iterable = iter(iterable)
-    return iter(lambda: list(itertools.islice(iterable, n)), [])
+    return iter(lambda: tuple(itertools.islice(iterable, n)), ())
 
 
 def lazy_substitute(d: Dict, aliases: Dict):
@@ -140,9 +246,75 @@ def lazy_substitute(d: Dict, aliases: Dict):
     Simple top level substitute that doesn't dive into mongo like strings.
     """
     for alias, key in aliases.items():
-        if key in d:
-            d[alias] = d[key]
-            del d[key]
+        value = d.pop(key, _MISSING)
+        if value is not _MISSING:
+            d[alias] = value
+
+
+@lru_cache(maxsize=4096)
+def _split_path(key: str) -> Tuple[str, ...]:
+    """Splits a mongo like key into its path, cached as aliases are reused for every document."""
+    return tuple(key.split("."))
+
+
+def _get_child(obj: Any, k: str) -> Any:
+    """Gets a value from a dict, or from a list by its index."""
+    return obj[int(k)] if isinstance(obj, list) else obj[k]
+
+
+def _del_child(obj: Any, k: str):
+    """Deletes a value from a dict, or from a list by its index."""
+    del obj[int(k) if isinstance(obj, list) else k]
+
+
+def _pop_child(obj: Any, k: str) -> Any:
+    """Removes and returns a value from a dict or list, or _MISSING if it doesn't exist."""
+    try:
+        return obj.pop(int(k) if isinstance(obj, list) else k)
+    except (LookupError, ValueError):
+        return _MISSING
+
+
+def _get_parents(d: Dict, path: Tuple[str, ...]) -> Optional[List]:
+    """Gets the containers along a path, from d down to the parent of its last key.
+
+    Returns None if the path doesn't lead to a dict or list.
+    """
+    parents = [d]
+    try:
+        for k in path[:-1]:
+            parents.append(_get_child(parents[-1], k))
+    except (LookupError, TypeError, ValueError):
+        return None
+    return parents if isinstance(parents[-1], (dict, list)) else None
+
+
+def _prune_empty(parents: List, path: Tuple[str, ...]):
+    """Removes the containers along a path that have been left empty, deepest first."""
+    for i in range(len(path) - 2, -1, -1):
+        if len(parents[i + 1]) > 0:
+            break
+        _del_child(parents[i], path[i])
+
+
+def _pad_list(lst: List, k: str, fill: Any = None) -> int:
+    """Extends a list up to an index, as pydash did, and returns the index."""
+    i = int(k)
+    if i >= len(lst):
+        lst.extend([None] * (i - len(lst)))
+        lst.append(fill)
+    return i
+
+
+def _set_path(d: Dict, path: Tuple[str, ...], value: Any):
+    """Sets the value at a path, creating missing dicts and padding lists with None along the way."""
+    cur = d
+    for k in path[:-1]:
+        cur = cur.setdefault(k, {}) if isinstance(cur, dict) else cur[_pad_list(cur, k, {})]
+    if isinstance(cur, dict):
+        cur[path[-1]] = value
+    else:
+        cur[_pad_list(cur, path[-1])] = value
 
 
 def substitute(d: Dict, aliases: Dict):
@@ -151,20 +323,39 @@ def substitute(d: Dict, aliases: Dict):
     Accepts multilevel mongo like keys.
     """
     for alias, key in aliases.items():
-        if has(d, key):
-            set_(d, alias, get(d, key))
+        # Walk down to the value once, recording the parents on the way. The value is
+        # only removed once it has been written at the alias, so a failed write
+        # leaves the document intact
+        path = _split_path(key)
+        alias_path = _split_path(alias)
+        if alias_path == path:
+            continue
+        parents = _get_parents(d, path)
+        if parents is None:
+            continue
+        try:
+            value = _get_child(parents[-1], path[-1])
+        except (LookupError, ValueError):
+            continue
+        _set_path(d, alias_path, value)
+        n = min(len(path), len(alias_path))
+        if path[:n] == alias_path[:n]:
+            # Writing one path inside the other may have replaced the recorded parents
             unset(d, key)
+        else:
+            _pop_child(parents[-1], path[-1])
+            _prune_empty(parents, path)
 
 
 def unset(d: Dict, key: str):
     """
     Unsets a key.
     """
-    _unset(d, key)
-    path = to_path(key)
-    for i in reversed(range(1, len(path))):
-        if len(get(d, path[:i])) == 0:
-            unset(d, path[:i])
+    path = _split_path(key)
+    parents = _get_parents(d, path)
+    if parents is not None:
+        _pop_child(parents[-1], path[-1])
+        _prune_empty(parents, path)
 
 
 class Timeout:
@@ -177,12 +368,13 @@ class Timeout:
         """
         Set a maximum running time for functions.
 
-        :param seconds (int): Seconds before TimeoutError raised, set to None to disable,
+        :param seconds (float): Seconds before TimeoutError raised, set to None to disable,
         default is set assuming a maximum running time of 1 day for 100,000 items
-        parallelized across 16 cores, i.e. int(16 * 24 * 60 * 60 / 1e5)
+        parallelized across 16 cores, i.e. int(16 * 24 * 60 * 60 / 1e5). Timeouts are
+        not available on platforms without SIGALRM, e.g. Windows, and are ignored there.
         :param error_message (str): Error message to display with TimeoutError
         """
-        self.seconds = int(seconds) if seconds else None
+        self.seconds = float(seconds) if seconds and hasattr(signal, "SIGALRM") else None
         self.error_message = error_message
 
     def handle_timeout(self, signum, frame):
@@ -196,15 +388,23 @@ class Timeout:
         Enter context with timeout.
         """
         if self.seconds:
-            signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.seconds)
+            # Keep the previous handler and timer so that Timeouts can be nested
+            self._old_handler = signal.signal(signal.SIGALRM, self.handle_timeout)
+            self._old_timer, _ = signal.setitimer(signal.ITIMER_REAL, self.seconds)
+            self._start = time.monotonic()
 
     def __exit__(self, type, value, traceback):
         """
         Exit context with timeout.
         """
         if self.seconds:
-            signal.alarm(0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if self._old_handler is not None:
+                signal.signal(signal.SIGALRM, self._old_handler)
+            if self._old_timer:
+                # Re-arm the enclosing timer with the time it had left
+                remaining = self._old_timer - (time.monotonic() - self._start)
+                signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6))
 
 
 def dynamic_import(abs_module_path: str, class_name: Optional[str] = None):
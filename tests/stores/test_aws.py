@@ -2,13 +2,16 @@ import time
 from datetime import datetime
 
 import boto3
+import botocore.session
+import msgpack
 import pytest
 from botocore.exceptions import ClientError
 from moto import mock_s3
 from sshtunnel import BaseSSHTunnelForwarderError
 
-from maggma.stores import MemoryStore, MongoStore, S3Store
+from maggma.stores import MemoryStore, MongoStore, S3Store, aws
 from maggma.stores.ssh_tunnel import SSHTunnel
+from maggma.utils import grouper
 
 
 @pytest.fixture()
@@ -147,6 +150,45 @@ def test_multi_update(s3store, s3store_multi):
     assert time_single > time_multi * (s3store_multi.s3_workers - 1) / (s3store.s3_workers)
 
 
+def test_executor_reuse(s3store_multi):
+    s3store_multi.update([{"task_id": "mp-1", "data": "asd"}])
+    executor = s3store_multi._executor
+    assert executor is not None
+
+    s3store_multi.update([{"task_id": "mp-2", "data": "asd"}])
+    assert len(list(s3store_multi.query())) == 2
+    assert s3store_multi._executor is executor
+
+    # Resetting the connection keeps the pool, but its threads use buckets of the new resource
+    old_bucket = executor.submit(s3store_multi._get_bucket).result()
+    s3store_multi.connect(force_reset=True)
+    assert s3store_multi._executor is executor
+    new_bucket = executor.submit(s3store_multi._get_bucket).result()
+    assert new_bucket is not old_bucket
+    assert new_bucket.meta.client is s3store_multi.s3.meta.client
+    s3store_multi.update([{"task_id": "mp-3", "data": "asd"}])
+    assert s3store_multi.query_one({"task_id": "mp-3"})["data"] == "asd"
+
+    s3store_multi.close()
+    assert s3store_multi._executor is None
+
+
+def test_reset_during_query(s3store_multi):
+    s3store_multi.update([{"task_id": f"mp-{i}", "data": "asd"} for i in range(20)])
+    docs = s3store_multi.query()
+    first = next(docs)
+    s3store_multi.connect(force_reset=True)
+    assert len([first, *docs]) == 20
+
+
+def test_update_index_batches(s3store_multi, mocker):
+    mocker.patch("maggma.stores.aws.INDEX_BATCH_SIZE", 3)
+    index_update = mocker.spy(s3store_multi.index, "update")
+    s3store_multi.update([{"task_id": f"mp-{i}", "data": i} for i in range(10)])
+    assert [len(call.args[0]) for call in index_update.call_args_list] == [3, 3, 3, 1]
+    assert s3store_multi.count() == 10
+
+
 def test_count(s3store):
     assert s3store.count() == 2
     assert s3store.count({"task_id": "mp-3"}) == 1
@@ -160,6 +202,33 @@ def test_query(s3store):
     assert len(list(s3store.query())) == 2
 
 
+def test_query_properties(s3store, mocker):
+    index_query = mocker.spy(s3store.index, "query")
+
+    # Fields present in the index are served without touching S3
+    mocker.patch.object(s3store.s3_bucket, "Object", side_effect=AssertionError("should not read from S3"))
+    assert s3store.query_one({"task_id": "mp-1"}, properties=["task_id"]) == {"task_id": "mp-1"}
+    assert "s3-to-mongo-keys" not in index_query.call_args.kwargs["properties"]
+    mocker.stopall()
+
+    doc = s3store.query_one({"task_id": "mp-1"}, properties=["task_id", "data"])
+    assert doc["data"] == "asd"
+    assert s3store.last_updated_field in doc
+
+
+def test_query_multi(s3store_multi):
+    s3store_multi.update([{"task_id": f"mp-{i:02d}", "data": i} for i in range(20)])
+    s3store_multi.s3_bucket.Object("mp-05").delete()
+
+    docs = list(s3store_multi.query(sort={"task_id": 1}))
+    assert [d["data"] for d in docs] == [i for i in range(20) if i != 5]
+
+    docs = list(s3store_multi.query(properties=["task_id"]))
+    assert len(docs) == 20
+
+    assert s3store_multi.query_one({"task_id": "mp-07"})["data"] == 7
+
+
 def test_update(s3store):
     s3store.update(
         [
@@ -180,6 +249,92 @@ def test_update(s3store):
     assert s3store.query_one({"task_id": "mp-4"})["data"] == "asd"
 
 
+def test_update_zstd(s3store):
+    pytest.importorskip("zstandard")
+    s3store.compress = True
+    s3store.compression = "zstd"
+    s3store.update([{"task_id": "mp-4", "data": "asd"}])
+    assert s3store.index.query_one({"task_id": "mp-4"})["compression"] == "zstd"
+    assert s3store.query_one({"task_id": "mp-4"})["data"] == "asd"
+
+    # objects written with a different algorithm are still readable
+    s3store.compression = "zlib"
+    s3store.update([{"task_id": "mp-5", "data": "sdf"}])
+    assert s3store.query_one({"task_id": "mp-4"})["data"] == "asd"
+    assert s3store.query_one({"task_id": "mp-5"})["data"] == "sdf"
+
+    with pytest.raises(ValueError, match="Unknown compression"):
+        S3Store(MemoryStore("index"), "bucket1", compression="gzip")
+
+    # New options don't shift the positional arguments that came before them
+    store = S3Store(MemoryStore("index"), "bucket1", None, True, "http://localhost:9000")
+    assert store.endpoint_url == "http://localhost:9000"
+    assert store.compression == "zlib"
+
+
+def test_read_data_override(s3store, mocker):
+    # Overrides of _read_data without the serialization argument still read msgpack objects
+    def read_data(data, compress_header):
+        return {"data": "custom"}
+
+    mocker.patch.object(s3store, "_read_data", side_effect=read_data)
+    assert s3store.query_one({"task_id": "mp-1"})["data"] == "custom"
+
+
+def test_update_orjson(s3store):
+    tic = datetime(2018, 4, 12, 16)
+    s3store.serialization = "orjson"
+    s3store.update([{"task_id": "mp-4", "data": "asd", "created": tic}])
+    assert s3store.index.query_one({"task_id": "mp-4"})["serialization"] == "orjson"
+    doc = s3store.query_one({"task_id": "mp-4"})
+    assert doc["data"] == "asd"
+    assert doc["created"]["@class"] == "datetime"
+
+    # msgpack objects already in the bucket are still readable
+    assert s3store.query_one({"task_id": "mp-1"})["data"] == "asd"
+
+    s3store.compress = True
+    s3store.update([{"task_id": "mp-5", "data": "sdf"}])
+    assert s3store.query_one({"task_id": "mp-5"})["data"] == "sdf"
+
+
+def test_serializer_reuse(s3store_multi):
+    s3store_multi.compress = True
+    s3store_multi.update([{"task_id": f"mp-{i}", "data": "asd"} for i in range(4)])
+    assert s3store_multi.query_one({"task_id": "mp-3"})["data"] == "asd"
+
+    pack = s3store_multi._get_serialization_function()
+    assert pack.__self__ is s3store_multi._get_serialization_function().__self__
+    assert pack({"data": "asd"}) == msgpack.packb({"data": "asd"})
+    # Each thread gets its own packer
+    other = s3store_multi._get_executor().submit(s3store_multi._get_serialization_function).result()
+    assert other.__self__ is not pack.__self__
+
+
+def test_update_multipart(s3store, mocker):
+    mocker.patch("maggma.stores.aws.MULTIPART_THRESHOLD", 1)
+    s3store.update([{"task_id": "mp-4", "data": "asd"}])
+    assert s3store.query_one({"task_id": "mp-4"})["data"] == "asd"
+    assert s3store.s3_bucket.Object("mp-4").metadata["task-id"] == "mp-4"
+
+
+def test_query_multipart(s3store, mocker):
+    mocker.patch("maggma.stores.aws.MULTIPART_THRESHOLD", 16)
+    data = "".join(str(i) for i in range(100))
+    s3store.update([{"task_id": "mp-4", "data": data}])
+    assert s3store.query_one({"task_id": "mp-4"})["data"] == data
+    assert s3store.query_one({"task_id": "mp-1"})["data"] == "asd"
+
+
+def test_query_empty_object(s3store):
+    # Ranged GETs of empty objects fail with InvalidRange
+    s3store.s3_bucket.put_object(Key="mp-4", Body=b"")
+    s3store.index.update([{"task_id": "mp-4"}])
+    s3store.unpack_data = False
+    assert s3store.query_one({"task_id": "mp-4"}) == b""
+    assert s3store.query_one({"task_id": "mp-1"}) != b""
+
+
 def test_rebuild_meta_from_index(s3store):
     s3store.update([{"task_id": "mp-2", "data": "asd"}])
     s3store.index.update({"task_id": "mp-2", "add_meta": "hello"})
@@ -197,6 +352,34 @@ def test_rebuild_index(s3store):
     assert s3store.index.query_one({"task_id": "mp-2"})["obj_hash"] == "a69fe0c2cca3a3384c2b1d2f476972704f179741"
 
 
+def test_rebuild_index_mixed_codecs(s3store_multi):
+    s3store_multi.update([{"task_id": "mp-1", "data": "asd"}])
+    s3store_multi.compress = True
+    s3store_multi.update([{"task_id": "mp-2", "data": "asd"}])
+    s3store_multi.compression = "zstd"
+    s3store_multi.update([{"task_id": "mp-3", "data": "asd"}])
+    s3store_multi.serialization = "orjson"
+    s3store_multi.update([{"task_id": "mp-4", "data": "asd"}])
+
+    s3store_multi.index.remove_docs({})
+    s3store_multi.rebuild_index_from_s3_data()
+    assert s3store_multi.index.count() == 4
+    assert [d["data"] for d in s3store_multi.query(sort={"task_id": 1})] == ["asd"] * 4
+
+
+def test_rebuild_index_multi(s3store_multi, s3store_w_subdir):
+    s3store_multi.update([{"task_id": f"mp-{i}", "data": "asd"} for i in range(10)])
+    s3store_multi.index.remove_docs({})
+    s3store_multi.rebuild_index_from_s3_data()
+    assert s3store_multi.index.count() == 10
+    assert s3store_multi.query_one({"task_id": "mp-3"})["data"] == "asd"
+
+    s3store_w_subdir.update([{"task_id": "mp-1", "data": "asd"}])
+    s3store_w_subdir.index.remove_docs({})
+    s3store_w_subdir.rebuild_index_from_s3_data()
+    assert s3store_w_subdir.query_one({"task_id": "mp-1"})["data"] == "asd"
+
+
 def tests_msonable_read_write(s3store):
     dd = s3store.as_dict()
     s3store.update([{"task_id": "mp-2", "data": dd}])
@@ -226,6 +409,15 @@ def test_remove(s3store):
     assert s3store.query_one({"task_id": "mp-5"}) is not None
 
 
+def test_remove_multi(s3store_multi, mocker):
+    mocker.patch("maggma.stores.aws.grouper", side_effect=lambda it, n: grouper(it, 2))
+    s3store_multi.update([{"task_id": f"mp-{i}", "data": i} for i in range(7)])
+    s3store_multi.remove_docs({"task_id": {"$in": ["mp-1", "mp-2", "mp-3", "mp-4", "mp-5"]}}, remove_s3_object=True)
+
+    assert s3store_multi.count() == 2
+    assert sorted(o.key for o in s3store_multi.s3_bucket.objects.all()) == ["mp-0", "mp-6"]
+
+
 def test_close(s3store):
     list(s3store.query())
     s3store.close()
@@ -280,6 +472,13 @@ def test_subdir_field(s3store_w_subdir):
         assert cc["sub_dir"] == s3store_w_subdir.sub_dir
 
 
+def test_full_key_path(s3store, s3store_w_subdir):
+    assert s3store._get_full_key_path("mp-1") == "mp-1"
+    assert s3store._get_full_key_path(1) == "1"
+    assert s3store_w_subdir._get_full_key_path("mp-1") == "subdir1/mp-1"
+    assert s3store_w_subdir._get_full_key_path(1) == "subdir1/1"
+
+
 def test_remove_subdir(s3store_w_subdir):
     s3store_w_subdir.update([{"task_id": "mp-2", "data": "asd"}])
     s3store_w_subdir.update([{"task_id": "mp-4", "data": "asd"}])
@@ -357,6 +556,44 @@ def test_get_session(s3store):
     assert store._get_session().get_credentials().secret_key == "SECRET_KEY"
 
 
+def test_session_cache():
+    profile = {"aws_access_key_id": "ACCESS_KEY", "aws_secret_access_key": "SECRET_KEY"}
+    store = S3Store(MemoryStore("index"), "bucket1", s3_profile=profile)
+    other = S3Store(MemoryStore("index"), "bucket2", s3_profile=dict(profile))
+    assert store._get_session() is other._get_session()
+
+    profile = {"aws_access_key_id": "OTHER_KEY", "aws_secret_access_key": "SECRET_KEY"}
+    other = S3Store(MemoryStore("index"), "bucket1", s3_profile=profile)
+    assert store._get_session() is not other._get_session()
+
+    # Rotated credentials don't pile up in the cache
+    for i in range(2 * aws.MAX_CACHED_SESSIONS):
+        S3Store(MemoryStore("index"), "bucket1", s3_profile={**profile, "aws_session_token": str(i)})._get_session()
+    assert len(aws._SESSIONS) == aws.MAX_CACHED_SESSIONS
+
+    # Profiles that can't be used as a cache key still get a session
+    botocore_session = botocore.session.get_session()
+    store = S3Store(MemoryStore("index"), "bucket1", s3_profile={"botocore_session": botocore_session})
+    assert store._get_session()._session is botocore_session
+
+
+def test_resource_config(s3store_multi):
+    from botocore.config import Config
+
+    assert s3store_multi.s3.meta.client.meta.config.max_pool_connections == 40
+    s3store_multi._executor = None
+    s3store_multi.update([{"task_id": "mp-1", "data": "asd"}])
+    # Worker threads share the client of the main resource
+    worker_bucket = s3store_multi._executor.submit(s3store_multi._get_bucket).result()
+    assert worker_bucket is not s3store_multi.s3_bucket
+    assert worker_bucket.meta.client is s3store_multi.s3.meta.client
+
+    s3store_multi.s3_resource_kwargs = {"config": Config(max_pool_connections=5, connect_timeout=3)}
+    s3store_multi.connect(force_reset=True)
+    assert s3store_multi.s3.meta.client.meta.config.max_pool_connections == 5
+    assert s3store_multi.s3.meta.client.meta.config.connect_timeout == 3
+
+
 def test_no_bucket():
     with mock_s3():
         conn = boto3.resource("s3", region_name="us-east-1")
@@ -368,6 +605,19 @@ def test_no_bucket():
             store.connect()
 
 
+def test_bucket_forbidden(mocker):
+    with mock_s3():
+        index = MemoryStore("index")
+        store = S3Store(index, "bucket1")
+        error_response = {"Error": {"Code": "403", "Message": "Forbidden"}}
+        mocker.patch(
+            "botocore.client.BaseClient._make_api_call",
+            side_effect=ClientError(error_response, "HeadBucket"),
+        )
+        with pytest.raises(ClientError):
+            store.connect()
+
+
 def test_force_reset(s3store):
     content = [
         {
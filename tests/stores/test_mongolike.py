@@ -1,5 +1,6 @@
 import os
 import shutil
+import warnings
 from datetime import datetime
 from pathlib import Path
 from unittest import mock
@@ -244,6 +245,39 @@ def test_memory_store_connect():
     assert isinstance(memorystore._collection, mongomock.collection.Collection)
 
 
+def test_memory_store_newer_in_isoformat():
+    source = MemoryStore(last_updated_type="isoformat")
+    target = MemoryStore(last_updated_type="isoformat")
+    source.connect()
+    target.connect()
+
+    target.update([{"task_id": i, "last_updated": "2019-12-13T00:23:11.010"} for i in range(10)])
+    source.update([{"task_id": i, "last_updated": "2019-12-13T00:23:11.011"} for i in range(5)])
+    source.update([{"task_id": 20, "last_updated": "2019-12-13T00:23:11"}])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        assert sorted(target.newer_in(source, exhaustive=True)) == [0, 1, 2, 3, 4, 20]
+    assert sorted(source.newer_in(target, exhaustive=True)) == [5, 6, 7, 8, 9]
+
+    with pytest.warns(FutureWarning, match="lu_filter is deprecated"):
+        source.lu_filter(target)
+
+
+def test_memory_store_datetime_lu_legacy_strings():
+    source = MemoryStore()
+    target = MemoryStore()
+    source.connect()
+    target.connect()
+
+    # Leftover ISO strings in a datetime store are parsed when read
+    target.update([{"task_id": i, "last_updated": "2019-12-13T00:23:11.010"} for i in range(2)])
+    assert target.last_updated == datetime(2019, 12, 13, 0, 23, 11, 10000)
+    source.update([{"task_id": 0, "last_updated": datetime(2020, 1, 1)}])
+    assert target.last_updated == datetime(2019, 12, 13, 0, 23, 11, 10000)
+    assert target.newer_in(source, exhaustive=True) == [0]
+
+
 def test_groupby(memorystore):
     memorystore.update(
         [
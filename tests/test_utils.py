@@ -1,19 +1,34 @@
 """
 Tests for builders
 """
-from datetime import datetime
+
+import gc
+import logging
+import signal
+import sys
+from datetime import datetime, timezone
 from time import sleep
 
+import numpy as np
 import pytest
 
+from maggma import utils
+from maggma.stores import MemoryStore
 from maggma.utils import (
     Timeout,  # dt_to_isoformat_ceil_ms,; isostr_to_dt,
+    TqdmLoggingHandler,
+    confirm_field_index,
     dynamic_import,
+    get_tqdm,
     grouper,
+    invalidate_index_cache,
+    lazy_substitute,
     primed,
     recursive_update,
+    substitute,
     to_dt,
     to_isoformat_ceil_ms,
+    unset,
 )
 
 
@@ -32,6 +47,76 @@ def test_recursiveupdate():
     recursive_update(d, {"a": {"b": [7]}})
     assert d["a"]["b"] == [7]
 
+    recursive_update(d, {"a": {"c": None}, "d": {"e": 1}})
+    assert d["a"] == {"b": [7], "c": None}
+    assert d["d"] == {"e": 1}
+
+    # Deeply nested updates don't hit the recursion limit
+    d, u = {}, {}
+    dd, uu = d, u
+    for _ in range(5000):
+        dd["x"], uu["x"] = {"y": 1}, {}
+        dd, uu = dd["x"], uu["x"]
+    uu["z"] = 2
+    recursive_update(d, u)
+    assert dd == {"y": 1, "z": 2}
+
+
+def test_lazy_substitute():
+    d = {"a": 1, "b": None, "c.d": 3}
+    lazy_substitute(d, {"x": "a", "y": "b", "z": "c.d", "w": "missing"})
+    assert d == {"x": 1, "y": None, "z": 3}
+
+
+def test_substitute():
+    d = {"a": {"b": None, "c": 1}, "l": [{"m": 2, "o": 3}], "s": "str"}
+    substitute(d, {"x.y": "a.b", "n": "l.0.m", "z": "s.t", "w": "l.x"})
+    assert d == {"a": {"c": 1}, "l": [{"o": 3}], "s": "str", "x": {"y": None}, "n": 2}
+
+    d = {"a": {"b": 1}}
+    substitute(d, {"c": "a.b"})
+    assert d == {"c": 1}
+
+    # Aliases sharing a parent with their key keep it, and a key aliased to itself is kept
+    d = {"a": {"b": 1}, "e": 2}
+    substitute(d, {"a.c": "a.b", "e": "e"})
+    assert d == {"a": {"c": 1}, "e": 2}
+
+    # Lists are padded with None up to the alias index
+    d = {"a": 1, "b": 2, "l": []}
+    substitute(d, {"l.1.c": "b", "l.3": "a"})
+    assert d == {"l": [None, {"c": 2}, None, 1]}
+
+    # The value is kept if it can't be written at the alias
+    d = {"a": 1, "l": []}
+    with pytest.raises(ValueError, match="invalid literal"):
+        substitute(d, {"l.x": "a"})
+    assert d == {"a": 1, "l": []}
+
+    # Aliases inside the key they replace
+    d = {"a": {"b": {"c": 1}}}
+    substitute(d, {"a": "a.b"})
+    assert d == {"a": {"c": 1}}
+
+
+def test_unset():
+    d = {"a": {"b": {"c": 1}}, "d": 2}
+    unset(d, "a.b.c")
+    assert d == {"d": 2}
+
+    d = {"a": {"b": {"c": 1}, "e": 3}}
+    unset(d, "a.b.c")
+    assert d == {"a": {"e": 3}}
+
+    d = {"l": [{"m": 2}, {"n": 3}]}
+    unset(d, "l.0.m")
+    assert d == {"l": [{"n": 3}]}
+
+    d = {"a": 1}
+    unset(d, "b.c")
+    unset(d, "a.c")
+    assert d == {"a": 1}
+
 
 def test_timeout():
     def takes_too_long():
@@ -41,6 +126,24 @@ def test_timeout():
     with pytest.raises(TimeoutError):
         takes_too_long()
 
+    # Sub-second timeouts
+    with pytest.raises(TimeoutError, match="inner"), Timeout(seconds=0.1, error_message="inner"):
+        sleep(1)
+
+    # The enclosing handler and timer are restored
+    previous = signal.getsignal(signal.SIGALRM)
+
+    def nested():
+        with Timeout(seconds=0.3, error_message="outer"):
+            with Timeout(seconds=5, error_message="inner"):
+                sleep(0.05)
+            sleep(1)
+
+    with pytest.raises(TimeoutError, match="outer"):
+        nested()
+    assert signal.getsignal(signal.SIGALRM) is previous
+    assert signal.getitimer(signal.ITIMER_REAL) == (0.0, 0.0)
+
 
 def test_primed():
     global is_primed  # noqa: PLW0603
@@ -68,9 +171,90 @@ def test_primed():
 def test_datetime_utils():
     assert to_isoformat_ceil_ms(datetime(2019, 12, 13, 0, 23, 11, 9515)) == "2019-12-13T00:23:11.010"
     assert to_isoformat_ceil_ms("2019-12-13T00:23:11.010") == "2019-12-13T00:23:11.010"
+    assert to_isoformat_ceil_ms(datetime(999, 1, 2, 3, 4, 5)) == "0999-01-02T03:04:05.001"
+    assert to_isoformat_ceil_ms(datetime(2019, 12, 13, tzinfo=timezone.utc)) == "2019-12-13T00:00:00.001+00:00"
 
     assert to_dt("2019-12-13T00:23:11.010") == datetime(2019, 12, 13, 0, 23, 11, 10000)
     assert to_dt(datetime(2019, 12, 13, 0, 23, 11, 10000)) == datetime(2019, 12, 13, 0, 23, 11, 10000)
+    assert to_dt("2019-12-13T00:23:11") == datetime(2019, 12, 13, 0, 23, 11)
+    # Formats fromisoformat doesn't support on every python version go through dateutil
+    assert to_dt("2019-12-13T00:23:11.01Z").replace(tzinfo=None) == datetime(2019, 12, 13, 0, 23, 11, 10000)
+    assert to_dt("Dec 13 2019 00:23:11") == datetime(2019, 12, 13, 0, 23, 11)
+
+
+def test_confirm_field_index(mocker):
+    store = MemoryStore()
+    store.connect()
+    coll = store._collection
+    coll.create_index([("a", 1), ("b", 1)])
+
+    spy = mocker.spy(coll, "index_information")
+    assert confirm_field_index(coll, "a")
+    assert confirm_field_index(coll, ["c", "b"])
+    assert not confirm_field_index(coll, "c")
+    assert confirm_field_index(coll, ("c", "a"))
+    assert confirm_field_index(coll, (f for f in "ca"))
+    assert spy.call_count == 1
+
+    coll.create_index("c")
+    assert not confirm_field_index(coll, "c")
+    invalidate_index_cache(coll)
+    assert confirm_field_index(coll, "c")
+
+    # Creating an index through the store invalidates the cache
+    assert store.ensure_index("d")
+    assert confirm_field_index(coll, "d")
+
+    # Collections that are garbage collected leave the cache
+    other = MemoryStore()
+    other.connect()
+    assert not confirm_field_index(other._collection, "a")
+    key = id(other._collection)
+    assert key in utils._INDEXED_FIELDS
+    del other
+    gc.collect()
+    assert key not in utils._INDEXED_FIELDS
+
+
+def test_get_tqdm(monkeypatch):
+    from tqdm import tqdm
+    from tqdm.auto import tqdm as auto_tqdm
+
+    get_tqdm.cache_clear()
+    monkeypatch.delitem(sys.modules, "IPython", raising=False)
+    assert get_tqdm() is tqdm
+    assert get_tqdm() is tqdm
+
+    get_tqdm.cache_clear()
+    monkeypatch.setitem(sys.modules, "IPython", None)
+    assert get_tqdm() is auto_tqdm
+    get_tqdm.cache_clear()
+
+    from maggma.utils import tqdm as utils_tqdm
+
+    assert utils_tqdm is get_tqdm()
+
+
+def test_tqdm_logging_handler(mocker):
+    write = mocker.patch.object(get_tqdm(), "write")
+    logger = logging.getLogger("test_tqdm_logging_handler")
+    # Don't also go through handlers other tests may have left on the root logger
+    logger.propagate = False
+    handler = TqdmLoggingHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    logger.warning("test %s", 1)
+    write.assert_called_once_with("WARNING - test 1")
+
+    handle_error = mocker.patch.object(handler, "handleError")
+    write.side_effect = ValueError
+    logger.warning("fails")
+    handle_error.assert_called_once()
+
+    write.side_effect = KeyboardInterrupt
+    with pytest.raises(KeyboardInterrupt):
+        logger.warning("interrupted")
+    logger.removeHandler(handler)
 
 
 def test_dynamic_import():
@@ -86,3 +270,35 @@ def test_grouper():
     my_groups = list(grouper(my_iterable, 10))
     assert len(my_groups) == 11
     assert len(my_groups[10]) == 1
+
+    assert list(grouper("ABCDEFG", 3)) == [("A", "B", "C"), ("D", "E", "F"), ("G",)]
+    assert list(grouper(iter(range(5)), 2)) == [(0, 1), (2, 3), (4,)]
+    assert list(grouper([], 0)) == []
+
+    # Sequences are sliced
+    assert list(grouper(list(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(grouper(tuple(range(5)), 2)) == [(0, 1), (2, 3), (4,)]
+    arr = np.arange(5)
+    chunks = list(grouper(arr, 2))
+    assert [c.tolist() for c in chunks] == [[0, 1], [2, 3], [4]]
+    assert all(np.shares_memory(c, arr) for c in chunks)
+
+
+def test_grouper_pandas():
+    pd = pytest.importorskip("pandas")
+
+    df = pd.DataFrame({"a": range(5), "b": range(5)})
+    chunks = list(grouper(df, 2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert all(isinstance(c, pd.DataFrame) for c in chunks)
+    assert chunks[1]["a"].tolist() == [2, 3]
+    assert [c.tolist() for c in grouper(df["b"], 3)] == [[0, 1, 2], [3, 4]]
+
+
+def test_grouper_pyarrow():
+    pa = pytest.importorskip("pyarrow")
+
+    table = pa.table({"a": range(5)})
+    chunks = list(grouper(table, 2))
+    assert all(isinstance(c, pa.Table) for c in chunks)
+    assert [c["a"].to_pylist() for c in chunks] == [[0, 1], [2, 3], [4]]